@@ -1,9 +1,17 @@
 import streamlit as st
-import pdfplumber
+import pypdfium2 as pdfium
 import os
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
+import tiktoken
 
 # --- Load environment variables ---
 load_dotenv()
@@ -16,18 +24,79 @@ st.title("🚀 Resume Scorer Pro")
 if 'analysis_done' not in st.session_state:
     st.session_state.update({
         'analysis_done': False,
-        'resume_text': "",
-        'analysis_result': {}
+        'analysis_results': [],
+        'batch_id': None,
+        'batch_entries': []
     })
 
+# --- Cached HTTP Session for OpenRouter ---
+class _CompletionRetry(Retry):
+    """Retry 429/5xx for reads, but re-send POSTs only when the server did not run the request."""
+    POST_RETRY_STATUSES = frozenset([429, 503])
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method == "POST" and status_code not in self.POST_RETRY_STATUSES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+@st.cache_resource
+def get_session():
+    # Auth is sent per request so a key loaded after the session was created still applies
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    # read=0: a POST that timed out after sending may already be running (and billed)
+    retries = _CompletionRetry(total=2, read=0, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                               allowed_methods=None, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries)
+    session.mount("https://", adapter)
+    return session
+
 # --- Helper: Shorten Text for LLM Input ---
+SECTION_KEYWORDS = ["experience", "skills", "education", "project", "achievement"]
+SECTION_RE = re.compile("|".join(SECTION_KEYWORDS), re.I)
+
+RESUME_TOKEN_BUDGET = 220
+ENCODING_RETRY_SECONDS = 60
+
+@st.cache_resource
+def _encoding_state():
+    return {"encoding": None, "retry_at": 0.0}
+
+def get_encoding():
+    """Return the gpt-3.5-turbo tokenizer, or None if it cannot be loaded right now (e.g. offline).
+
+    Only a successful load is kept; after a failure the load is retried on a later call.
+    """
+    state = _encoding_state()
+    if state["encoding"] is None and time.monotonic() >= state["retry_at"]:
+        try:
+            state["encoding"] = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        except Exception:
+            state["retry_at"] = time.monotonic() + ENCODING_RETRY_SECONDS
+    return state["encoding"]
+
+def truncate_tokens(text, max_tokens):
+    encoding = get_encoding()
+    if encoding is None:
+        return text
+    # Resume text is plain data; strings like "<|endoftext|>" must not be treated as special tokens
+    ids = encoding.encode(text, disallowed_special=())
+    if len(ids) <= max_tokens:
+        return text
+    return encoding.decode(ids[:max_tokens])
+
 def shorten_text(text, max_length=700):
     if len(text) <= max_length:
         return text
-    keywords = ["experience", "skills", "education", "project", "achievement"]
+    # One case-insensitive scan finds the first occurrence of every keyword
+    first_seen = {}
+    for match in SECTION_RE.finditer(text):
+        first_seen.setdefault(match.group().lower(), match.start())
+        if len(first_seen) == len(SECTION_KEYWORDS):
+            break
     sections = []
-    for keyword in keywords:
-        idx = text.lower().find(keyword)
+    for keyword in SECTION_KEYWORDS:
+        idx = first_seen.get(keyword, -1)
         if idx != -1:
             start = max(0, idx - 50)
             end = min(len(text), idx + len(keyword) + 150)
@@ -36,67 +105,128 @@ def shorten_text(text, max_length=700):
     return result if result else text[:max_length]
 
 # --- Extract Text from Resume PDF ---
+@st.cache_resource
+def get_pdfium_lock():
+    # PDFium is not thread-safe and every browser session runs on its own thread
+    return threading.Lock()
+
+def _extract_pages(pdf_bytes):
+    with get_pdfium_lock():
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            # Stop once there is enough text for shorten_text; later pages are rarely needed
+            pages, total = [], 0
+            for i in range(min(3, len(pdf))):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                if page_text:
+                    pages.append(page_text)
+                    total += len(page_text) + 1
+                    if total >= 2000:
+                        break
+            return "\n".join(pages)
+        finally:
+            pdf.close()
+
+@st.cache_data(show_spinner=False, ttl=24 * 60 * 60, max_entries=64)
+def _extract(pdf_bytes):
+    return shorten_text(_extract_pages(pdf_bytes), 1000)
+
 def extract_resume_text(file):
+    """Return (text, error); error is None on success."""
     try:
-        with pdfplumber.open(file) as pdf:
-            full_text = "\n".join(page.extract_text() for page in pdf.pages[:3] if page.extract_text())
-            short_text = shorten_text(full_text, 1000)
-            st.session_state.resume_text = short_text
-            return short_text
+        file.seek(0)
+        text = _extract(file.read())
     except Exception as e:
-        return f"PDF Error: {str(e)}"
+        return "", f"PDF Error: {str(e)}"
+    # Token truncation runs outside the cached _extract so a tokenizer outage is not cached with it
+    return truncate_tokens(text, RESUME_TOKEN_BUDGET), None
+
+# --- Analysis Result ---
+@dataclass(slots=True)
+class AnalysisResult:
+    score: str = "N/A"
+    missing_skills: list = field(default_factory=list)
+    suggestion: list = field(default_factory=list)
+    error: str | None = None
+    prompt: str | None = None
 
 # --- Parse GPT Output ---
+SKILL_KEYWORDS = frozenset(["missing skills", "skills missing", "lacking skills", "required skills", "skill gaps"])
+SUGGESTION_KEYWORDS = frozenset(["suggestion", "recommend", "advice", "improvement"])
+SKILL_RE = re.compile("|".join(map(re.escape, sorted(SKILL_KEYWORDS))), re.I)
+SUG_RE = re.compile("|".join(map(re.escape, sorted(SUGGESTION_KEYWORDS))), re.I)
+SCORE_RE = re.compile(r"\b(\d{1,3})\b\s*(?:/100|out of 100)?")
+SCORE_KEYWORD_RE = re.compile(r"\bscore\b(?:[^0-9\n]{0,20}out of 100)?[^0-9\n]{0,20}(\d{1,3})\b", re.I)
+SCORE_SEARCH_LIMIT = 300
+SKILL_SPLIT_RE = re.compile(r",|\band\b")
+
 def parse_analysis_output(text):
-    result = {
-        "score": "N/A",
-        "missing_skills": ["Not specified"],
-        "suggestion": []
-    }
+    result = AnalysisResult(missing_skills=["Not specified"])
 
-    # --- Extract score using regex ---
-    score_match = re.search(r"\b(\d{1,3})\b\s*(?:/100|out of 100)?", text)
+    # --- Extract score: the model puts "Score: NN" near the top of its reply ---
+    score_found = skills_found = False
+    score_match = SCORE_KEYWORD_RE.search(text, 0, SCORE_SEARCH_LIMIT)
     if score_match:
+        score_found = True
         score = int(score_match.group(1))
         if 0 <= score <= 100:
-            result["score"] = str(score)
+            result.score = str(score)
 
-    # --- Extract missing skills ---
-    skill_keywords = ["missing skills", "skills missing", "lacking skills", "required skills", "skill gaps"]
-    for line in text.split('\n'):
-        if any(keyword in line.lower() for keyword in skill_keywords):
-            skills_line = line.split(':')[-1].strip()
-            skills = [s.strip(" .•-") for s in re.split(r",|and", skills_line)]
-            result["missing_skills"] = skills[:3]
+    # Single pass over the lines: score fallback, missing skills and suggestions
+    suggestion_section = suggestions_done = False
+    suggestions = []
+    for line in text.splitlines():
+        # Nothing left to look for once every field is settled
+        if score_found and skills_found and suggestions_done:
             break
 
-    # --- Extract multiple suggestions ---
-    suggestion_section = False
-    suggestions = []
-    for line in text.split('\n'):
-        if any(k in line.lower() for k in ["suggestion", "recommend", "advice", "improvement"]):
+        # --- Fall back to the first number in the reply ---
+        if not score_found:
+            score_match = SCORE_RE.search(line)
+            if score_match:
+                score_found = True
+                score = int(score_match.group(1))
+                if 0 <= score <= 100:
+                    result.score = str(score)
+
+        # --- Extract missing skills ---
+        if not skills_found and SKILL_RE.search(line):
+            skills_found = True
+            skills_line = line.split(':')[-1].strip()
+            skills = [s.strip(" .•-") for s in SKILL_SPLIT_RE.split(skills_line)]
+            result.missing_skills = skills[:3]
+
+        # --- Extract multiple suggestions ---
+        if suggestions_done:
+            continue
+        stripped = line.strip()
+        if SUG_RE.search(line):
             suggestion_section = True
-        elif suggestion_section and (line.strip().startswith("-") or line.strip().startswith("•")):
+        elif suggestion_section and (stripped.startswith("-") or stripped.startswith("•")):
             suggestions.append(line.strip("-• ").split('.')[0])
-        elif suggestion_section and not line.strip():
-            break
+            suggestions_done = len(suggestions) == 5
+        elif suggestion_section and not stripped:
+            suggestions_done = True
 
-    result["suggestion"] = suggestions[:5] if suggestions else ["No suggestions found."]
+    result.suggestion = suggestions if suggestions else ["No suggestions found."]
     return result
 
-# --- Use GPT-3.5 via OpenRouter ---
-def analyze_with_openrouter(jd, resume):
-    api_key = os.getenv("OPENROUTER_API_KEY")
-
-    if not api_key:
-        return {"error": "Missing OPENROUTER_API_KEY in .env file"}
+# --- Prompt Building ---
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+MAX_BATCH_SIZE = 8
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+ANALYSIS_INSTRUCTIONS = """
+- Give a score out of 100 for compatibility.
+- List two missing skills (comma-separated).
+- Suggest five improvements as a bullet list.
+"""
 
-    prompt = f"""
+def build_prompt(jd, resume):
+    return f"""
 You are a resume screening assistant.
 
 Job Description:
@@ -106,84 +236,401 @@ Resume:
 {resume}
 
 Now analyze:
-- Give a score out of 100 for compatibility.
-- List two missing skills (comma-separated).
-- Suggest five improvements as a bullet list.
-"""
+{ANALYSIS_INSTRUCTIONS}"""
+
+def build_batch_prompt(jd, resumes):
+    resume_blocks = "\n".join(f"=== RESUME {k} ===\n{r}" for k, r in enumerate(resumes, 1))
+    return f"""
+You are a resume screening assistant.
+
+Job Description:
+{jd}
+
+{resume_blocks}
+
+For each resume above, write a section starting with "### RESULT k" (k is the resume number) and in it:
+{ANALYSIS_INSTRUCTIONS}"""
+
+# --- Send a prompt to GPT-3.5 via OpenRouter ---
+def _stream_deltas(response):
+    """Yield content deltas from an OpenRouter server-sent event stream.
+
+    Raises RuntimeError if the stream reports an error or ends without the [DONE] frame,
+    so a truncated reply is never mistaken for a complete one.
+    """
+    for line in response.iter_lines():
+        # Skip keep-alive comments such as ": OPENROUTER PROCESSING"
+        if not line.startswith(b"data: "):
+            continue
+        payload = line[len(b"data: "):]
+        if payload == b"[DONE]":
+            return
+        frame = json.loads(payload)
+        choice = (frame.get("choices") or [{}])[0]
+        if "error" in frame or choice.get("finish_reason") == "error":
+            raise RuntimeError(f"OpenRouter Error: {frame.get('error') or 'stream ended with finish_reason=error'}")
+        delta = (choice.get("delta") or {}).get("content")
+        if delta:
+            yield delta
+    raise RuntimeError("OpenRouter Error: stream closed before [DONE]")
+
+def _chat_completion(prompt, write_stream=None, session=None):
+    """Return (output, error); exactly one of the two is None.
 
+    If write_stream is given (e.g. st.write_stream) the reply is streamed into it as tokens arrive.
+    Worker threads must pass the session in, since get_session() needs the script thread's context.
+    """
     data = {
         "model": "openai/gpt-3.5-turbo",
         "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0,
     }
+    if write_stream:
+        data["stream"] = True
 
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data,
+        headers = {"Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}"}
+        with (session or get_session()).post(
+            OPENROUTER_URL, headers=headers, json=data, timeout=60, stream=bool(write_stream)
+        ) as response:
+            if response.status_code != 200:
+                return None, f"OpenRouter Error: {response.text}"
+            if write_stream:
+                output = write_stream(_stream_deltas(response))
+            else:
+                output = response.json()["choices"][0]["message"]["content"]
+            # A 200 can still carry "content": null (e.g. a filtered reply)
+            if not isinstance(output, str):
+                return None, f"OpenRouter Error: reply had no text content ({output!r})"
+            return output, None
+    except RuntimeError as e:
+        # Raised by _stream_deltas with a ready-to-show message
+        return None, str(e)
+    except Exception as e:
+        return None, f"Request failed: {e}"
+
+# --- Use GPT-3.5 via OpenRouter ---
+@st.cache_data(ttl=24 * 60 * 60, max_entries=256, show_spinner=False)
+def _cached_reply(jd, resume, _reply=None):
+    """Return the cached raw reply for (jd, resume), storing _reply on a miss.
+
+    Called without _reply this is a lookup: a miss raises LookupError, which st.cache_data
+    does not cache. No st.* calls happen in here, so nothing is replayed on a hit.
+    """
+    if _reply is None:
+        raise LookupError("reply not cached")
+    return _reply
+
+def analyze_with_openrouter(jd, resume, write_stream=None):
+    if not os.getenv("OPENROUTER_API_KEY"):
+        return AnalysisResult(error="Missing OPENROUTER_API_KEY in .env file")
+
+    # Trailing whitespace should not cause a cache miss
+    jd, resume = jd.rstrip(), resume.rstrip()
+    try:
+        output = _cached_reply(jd, resume)
+    except LookupError:
+        prompt = build_prompt(jd, resume)
+        output, error = _chat_completion(prompt, write_stream)
+        # Failures and empty replies are not stored so the next click retries;
+        # _chat_completion only succeeds once a streamed reply has reached [DONE]
+        if error:
+            return AnalysisResult(error=error, prompt=prompt)
+        if not isinstance(output, str) or not output.strip():
+            return AnalysisResult(error="OpenRouter returned an empty reply", prompt=prompt)
+        _cached_reply(jd, resume, output)
+    return parse_analysis_output(output)
+
+# --- Thread pool for concurrent OpenRouter calls ---
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=8)
+
+# --- Analyze several resumes against one JD in a single call ---
+def _analyze_chunk(jd, chunk, session):
+    prompt = build_batch_prompt(jd, chunk)
+    output, error = _chat_completion(prompt, session=session)
+    if error:
+        return [AnalysisResult(error=error, prompt=prompt) for _ in chunk]
+
+    # Anything the model wrote before "### RESULT 1" is dropped
+    sections = {}
+    for section in output.split("### RESULT")[1:]:
+        number, _, body = section.partition("\n")
+        number = number.strip(" :#*")
+        if number.isdigit():
+            sections[int(number)] = body
+
+    results = []
+    for k in range(1, len(chunk) + 1):
+        if k in sections:
+            results.append(parse_analysis_output(sections[k]))
+        else:
+            results.append(AnalysisResult(error=f"No result returned for resume {k} of this batch", prompt=prompt))
+    return results
+
+def analyze_batch(jd, resumes, on_progress=None):
+    """Analyze an iterable of resumes, in chunks of MAX_BATCH_SIZE, and return results in input order.
+
+    Each chunk is sent as soon as it fills, so calls overlap with extracting the remaining resumes
+    when `resumes` is a generator. on_progress(done, total) is called as each chunk finishes.
+    """
+    if not os.getenv("OPENROUTER_API_KEY"):
+        return [AnalysisResult(error="Missing OPENROUTER_API_KEY in .env file") for _ in resumes]
+
+    # Fetched here on the script thread; workers have no ScriptRunContext for st.cache_resource
+    session = get_session()
+    executor = get_executor()
+    futures = {}
+    chunk, start = [], 0
+    for resume in resumes:
+        chunk.append(resume)
+        if len(chunk) == MAX_BATCH_SIZE:
+            futures[executor.submit(_analyze_chunk, jd, chunk, session)] = (start, len(chunk))
+            start, chunk = start + len(chunk), []
+    if chunk:
+        futures[executor.submit(_analyze_chunk, jd, chunk, session)] = (start, len(chunk))
+        start += len(chunk)
+
+    # Chunks are sent concurrently; requests releases the GIL while waiting on the socket
+    results = [None] * start
+    done = 0
+    for future in as_completed(futures):
+        offset, size = futures[future]
+        try:
+            results[offset:offset + size] = future.result()
+        except Exception as e:
+            # One bad chunk should not discard the others
+            results[offset:offset + size] = [AnalysisResult(error=f"Batch analysis failed: {e}") for _ in range(size)]
+        done += size
+        if on_progress:
+            on_progress(done, start)
+    return results
+
+# --- Async bulk mode via the OpenAI Batch API ---
+BATCH_API_URL = "https://api.openai.com/v1"
+
+def _batch_headers():
+    # The session defaults to JSON bodies; drop that so file uploads can be multipart
+    return {"Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}", "Content-Type": None}
+
+def build_batch_job(jd, resume):
+    return {
+        "model": "gpt-3.5-turbo",
+        "messages": [{"role": "user", "content": build_prompt(jd, resume)}],
+        "temperature": 0,
+    }
+
+def submit_batch(jobs):
+    """Upload jobs as a JSONL batch file and start a batch. Return (batch_id, error)."""
+    if not os.getenv("OPENAI_API_KEY"):
+        return None, "Missing OPENAI_API_KEY in .env file (required for async bulk mode)"
+
+    lines = [
+        json.dumps({"custom_id": str(i), "method": "POST", "url": "/v1/chat/completions", "body": job})
+        for i, job in enumerate(jobs)
+    ]
+
+    try:
+        session = get_session()
+        upload = session.post(
+            f"{BATCH_API_URL}/files",
+            headers=_batch_headers(),
+            data={"purpose": "batch"},
+            files={"file": ("resumes.jsonl", "\n".join(lines).encode("utf-8"))},
             timeout=60
         )
+        if upload.status_code != 200:
+            return None, f"Batch upload error: {upload.text}"
 
-        if response.status_code == 200:
-            output = response.json()["choices"][0]["message"]["content"]
-            return parse_analysis_output(output)
-        else:
-            return {"error": f"OpenRouter Error: {response.text}", "prompt": prompt}
+        batch = session.post(
+            f"{BATCH_API_URL}/batches",
+            headers=_batch_headers(),
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+            },
+            timeout=60
+        )
+        if batch.status_code != 200:
+            return None, f"Batch create error: {batch.text}"
+        return batch.json()["id"], None
     except Exception as e:
-        return {"error": f"Request failed: {e}"}
+        return None, f"Request failed: {e}"
+
+BATCH_FAILED_STATUS = "failed"
+# Expired and cancelled batches still return (and bill) the requests that finished
+BATCH_DONE_STATUSES = frozenset(["completed", "expired", "cancelled"])
+
+def check_batch(batch_id):
+    """Return (status, results, error); results map job index to AnalysisResult once the batch is done.
+
+    BATCH_FAILED_STATUS is final and has no results. A batch in BATCH_DONE_STATUSES may be
+    missing results for jobs that never ran.
+    """
+    try:
+        session = get_session()
+        batch = session.get(f"{BATCH_API_URL}/batches/{batch_id}", headers=_batch_headers(), timeout=60)
+        if batch.status_code != 200:
+            return None, None, f"Batch status error: {batch.text}"
+
+        info = batch.json()
+        if info["status"] == BATCH_FAILED_STATUS:
+            return info["status"], None, f"Batch failed: {info.get('errors') or 'no details returned'}"
+        if info["status"] not in BATCH_DONE_STATUSES:
+            return info["status"], None, None
+
+        # Successful requests land in output_file_id and failed ones in error_file_id;
+        # either may be missing (e.g. no output file when every request failed)
+        results = {}
+        for file_id in (info.get("output_file_id"), info.get("error_file_id")):
+            if not file_id:
+                continue
+            output = session.get(f"{BATCH_API_URL}/files/{file_id}/content", headers=_batch_headers(), timeout=60)
+            if output.status_code != 200:
+                return info["status"], None, f"Batch download error: {output.text}"
+
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    results[int(record["custom_id"])] = parse_analysis_output(content)
+                else:
+                    results[int(record["custom_id"])] = AnalysisResult(error=f"Batch job error: {record.get('error') or response}")
+        return info["status"], results, None
+    except Exception as e:
+        return None, None, f"Request failed: {e}"
+
+# --- Render one analysis result ---
+def show_result(result, resume_text):
+    if result.error:
+        st.error(result.error)
+        with st.expander("🔍 View Debug Info"):
+            st.code(result.prompt or "No prompt available")
+        st.markdown("""
+        **Tips to fix:**
+        - Make inputs shorter
+        - Check API key in `.env`
+        - Try again later
+        """)
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Compatibility Score", result.score)
+            st.write("**Missing Skills:**")
+            for skill in result.missing_skills:
+                st.write(f"- {skill}")
+        with col2:
+            st.write("**Improvement Suggestions:**")
+            suggestions = result.suggestion
+            if isinstance(suggestions, list):
+                for s in suggestions:
+                    st.write(f"- {s}")
+            else:
+                st.info(suggestions)
+            with st.expander("📟 View Processed Resume Text"):
+                st.text(resume_text[:700] + "...")
 
 # --- Main App Logic ---
 def main():
-    st.markdown("Upload your resume and paste a job description to get a compatibility analysis.")
+    st.markdown("Upload one or more resumes and paste a job description to get a compatibility analysis.")
+
+    if get_encoding() is None:
+        st.warning("Tokenizer could not be loaded; resume text is only capped by characters.")
 
     job_desc = st.text_area("📜 Job Description", height=100, placeholder="Enter job description (1-2 sentences)", max_chars=300)
-    resume_file = st.file_uploader("📄 Upload Resume (PDF, max 3 pages)", type=["pdf"])
+    resume_files = st.file_uploader("📄 Upload Resumes (PDF, max 3 pages each)", type=["pdf"], accept_multiple_files=True)
+
+    bulk_mode = st.toggle("🕒 Async bulk mode (Batch API: ~50% cheaper, results within 24h)")
 
     if st.button("Analyze Resume"):
-        if not job_desc or not resume_file:
+        if not job_desc or not resume_files:
             st.error("Please provide both a job description and a resume.")
         else:
             with st.spinner("Analyzing with GPT-3.5..."):
-                resume_text = extract_resume_text(resume_file)
-                if "Error" in resume_text:
-                    st.error(resume_text)
+                names, texts = [], []
+
+                def extracted_texts():
+                    for resume_file in resume_files:
+                        resume_text, error = extract_resume_text(resume_file)
+                        if error:
+                            st.error(f"{resume_file.name}: {error}")
+                        else:
+                            names.append(resume_file.name)
+                            texts.append(resume_text)
+                            yield resume_text
+
+                results = []
+                if bulk_mode:
+                    list(extracted_texts())
+                    if texts:
+                        batch_id, error = submit_batch([build_batch_job(job_desc, t) for t in texts])
+                        if error:
+                            st.error(error)
+                        else:
+                            st.session_state.batch_id = batch_id
+                            st.session_state.batch_entries = [
+                                {"name": n, "resume_text": t} for n, t in zip(names, texts)
+                            ]
+                elif len(resume_files) == 1:
+                    list(extracted_texts())
+                    if texts:
+                        # Show the raw reply while it streams in, then replace it with the parsed results
+                        live_output = st.empty()
+                        results = [analyze_with_openrouter(job_desc, texts[0], live_output.write_stream)]
+                        live_output.empty()
                 else:
-                    result = analyze_with_openrouter(job_desc, resume_text)
-                    st.session_state.analysis_result = result
+                    # Chunks go out while later PDFs are still being extracted
+                    progress = st.progress(0.0, text=f"Analyzing {len(resume_files)} resumes...")
+                    results = analyze_batch(
+                        job_desc,
+                        extracted_texts(),
+                        on_progress=lambda done, total: progress.progress(done / total, text=f"Analyzed {done}/{total} resumes"),
+                    )
+                    progress.empty()
+
+                if results:
+                    st.session_state.analysis_results = [
+                        {"name": n, "resume_text": t, "result": r}
+                        for n, t, r in zip(names, texts, results)
+                    ]
                     st.session_state.analysis_done = True
 
+    if st.session_state.batch_id:
+        st.info(f"Batch `{st.session_state.batch_id}` submitted for {len(st.session_state.batch_entries)} resume(s).")
+        if st.button("Check status"):
+            status, results, error = check_batch(st.session_state.batch_id)
+            if status == BATCH_FAILED_STATUS:
+                st.error(error)
+                st.session_state.batch_id = None
+                st.session_state.batch_entries = []
+            elif error:
+                st.error(error)
+            elif results is None:
+                st.info(f"Batch status: {status}")
+            else:
+                if status != "completed":
+                    st.warning(f"Batch {status}: showing results for the requests that finished.")
+                st.session_state.analysis_results = [
+                    {**entry, "result": results.get(i, AnalysisResult(error="No result returned for this resume"))}
+                    for i, entry in enumerate(st.session_state.batch_entries)
+                ]
+                st.session_state.analysis_done = True
+                st.session_state.batch_id = None
+
     if st.session_state.analysis_done:
         st.divider()
         st.subheader("📊 Analysis Results")
-        result = st.session_state.analysis_result
-
-        if "error" in result:
-            st.error(result["error"])
-            with st.expander("🔍 View Debug Info"):
-                st.code(result.get("prompt", "No prompt available"))
-            st.markdown("""
-            **Tips to fix:**
-            - Make inputs shorter
-            - Check API key in `.env`
-            - Try again later
-            """)
-        else:
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Compatibility Score", result.get("score", "N/A"))
-                st.write("**Missing Skills:**")
-                for skill in result.get("missing_skills", []):
-                    st.write(f"- {skill}")
-            with col2:
-                st.write("**Improvement Suggestions:**")
-                suggestions = result.get("suggestion", [])
-                if isinstance(suggestions, list):
-                    for s in suggestions:
-                        st.write(f"- {s}")
-                else:
-                    st.info(suggestions)
-                with st.expander("📟 View Processed Resume Text"):
-                    st.text(st.session_state.resume_text[:700] + "...")
+        entries = st.session_state.analysis_results
+
+        for entry in entries:
+            if len(entries) > 1:
+                st.markdown(f"#### {entry['name']}")
+            show_result(entry["result"], entry["resume_text"])
 
 if __name__ == "__main__":
     main()